@@ -1,9 +1,102 @@
+import atexit
+import threading
+from contextlib import contextmanager
+
 import baostock as bs
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Optional
 
 
+# baostock使用进程内全局单连接，非线程安全；会话期间持锁串行访问
+_session_lock = threading.RLock()
+_session_depth = 0
+_persistent_login = False
+
+# baostock未登录错误码（BSERR_NO_LOGIN），长时间空闲后服务端会话失效时返回
+BS_NO_LOGIN_ERROR = '10001001'
+
+
+def _login() -> bool:
+    """登录baostock，返回是否成功"""
+    lg = bs.login()
+    if lg.error_code != '0':
+        print(f'登录失败 error_code: {lg.error_code}, error_msg: {lg.error_msg}')
+        return False
+    return True
+
+
+def _query_with_relogin(query, *args, **kwargs):
+    """执行baostock查询，登录已失效时重新登录并重试一次（需在会话锁内调用）"""
+    rs = query(*args, **kwargs)
+    if rs.error_code == BS_NO_LOGIN_ERROR and _login():
+        rs = query(*args, **kwargs)
+    return rs
+
+
+@contextmanager
+def baostock_session():
+    """
+    baostock登录会话上下文，嵌套使用时复用同一次登录
+
+    批量获取多只股票时在外层打开会话，内部的get_k_data调用不再重复登录/登出
+
+    Yields:
+        bool: 登录是否成功
+    """
+    global _session_depth
+    with _session_lock:
+        if _session_depth == 0 and not _login():
+            yield False
+            return
+
+        _session_depth += 1
+        try:
+            yield True
+        finally:
+            _session_depth -= 1
+            if _session_depth == 0:
+                # 最外层会话结束时登出系统
+                bs.logout()
+
+
+def keep_baostock_login() -> bool:
+    """
+    保持baostock登录直到进程退出
+
+    同一进程内先后多次获取数据时（如先检查再更新），后续调用直接复用该登录，
+    进程退出时自动登出；服务端会话因空闲失效后，下一次查询会自动重新登录
+
+    Returns:
+        bool: 登录是否成功
+    """
+    global _session_depth, _persistent_login
+    with _session_lock:
+        if _persistent_login:
+            return True
+        if _session_depth == 0 and not _login():
+            return False
+
+        _session_depth += 1
+        _persistent_login = True
+        atexit.register(release_baostock_login)
+        return True
+
+
+def release_baostock_login():
+    """释放keep_baostock_login保持的登录，没有其他会话时登出系统"""
+    global _session_depth, _persistent_login
+    with _session_lock:
+        if not _persistent_login:
+            return
+        _persistent_login = False
+        atexit.unregister(release_baostock_login)
+
+        _session_depth -= 1
+        if _session_depth == 0:
+            bs.logout()
+
+
 def format_stock_code(code: str) -> str:
     """
     自动格式化股票代码，添加正确的市场前缀
@@ -166,12 +259,15 @@ def get_k_data(stock_code: str, count: int, frequency: str = "d", include_valuat
         print(f"❌ 股票代码错误: {e}")
         return None
     
-    # 登录系统
-    lg = bs.login()
-    if lg.error_code != '0':
-        print(f'登录失败 error_code: {lg.error_code}, error_msg: {lg.error_msg}')
-        return None
-    
+    # 登录系统（已处于外层会话中时复用该次登录）
+    with baostock_session() as logged_in:
+        if not logged_in:
+            return None
+        return _query_k_data(stock_code, count, frequency, include_valuation)
+
+
+def _query_k_data(stock_code: str, count: int, frequency: str, include_valuation: bool) -> Optional[pd.DataFrame]:
+    """在已登录的baostock会话中查询K线数据，参数与返回值同get_k_data"""
     try:
         # 根据频率类型确定时间范围和字段
         frequency_lower = frequency.lower()
@@ -190,8 +286,9 @@ def get_k_data(stock_code: str, count: int, frequency: str = "d", include_valuat
             # 分钟线：向前推算足够天数（分钟线数据量大）
             days_to_subtract = count // 50 + 10  # 估算，每天约240个5分钟数据
         
-        start_date = (datetime.now() - timedelta(days=days_to_subtract)).strftime('%Y-%m-%d')
-        end_date = datetime.now().strftime('%Y-%m-%d')
+        now = datetime.now()
+        start_date = (now - timedelta(days=days_to_subtract)).strftime('%Y-%m-%d')
+        end_date = now.strftime('%Y-%m-%d')
         
         # 根据频率类型构建查询字段
         if frequency_lower == "d":
@@ -220,7 +317,8 @@ def get_k_data(stock_code: str, count: int, frequency: str = "d", include_valuat
             return None
         
         # 获取历史K线数据
-        rs = bs.query_history_k_data_plus(
+        rs = _query_with_relogin(
+            bs.query_history_k_data_plus,
             stock_code,
             query_fields,
             start_date=start_date, 
@@ -233,10 +331,13 @@ def get_k_data(stock_code: str, count: int, frequency: str = "d", include_valuat
             print(f'查询K线数据失败 error_code: {rs.error_code}, error_msg: {rs.error_msg}')
             return None
         
-        # 收集数据
+        # 收集数据（预先绑定方法，减少循环内的属性查找）
         data_list = []
-        while (rs.error_code == '0') & rs.next():
-            data_list.append(rs.get_row_data())
+        append_row = data_list.append
+        next_row = rs.next
+        get_row_data = rs.get_row_data
+        while rs.error_code == '0' and next_row():
+            append_row(get_row_data())
         
         if not data_list:
             print('未获取到任何数据')
@@ -270,10 +371,6 @@ def get_k_data(stock_code: str, count: int, frequency: str = "d", include_valuat
     except Exception as e:
         print(f'获取K线数据时发生错误: {str(e)}')
         return None
-    
-    finally:
-        # 登出系统
-        bs.logout()
 
 
 # 为了向后兼容，保留原来的函数名
@@ -141,13 +141,15 @@ class MDTableConverter:
         md_lines.append("| " + " | ".join(headers) + " |")
         md_lines.append("| " + " | ".join(["---"] * len(headers)) + " |")
         
-        # 添加数据行
-        for _, row in data.iterrows():
-            formatted_row = []
-            for col in data.columns:
-                formatted_value = self.format_value(col, row[col])
-                formatted_row.append(formatted_value)
-            md_lines.append("| " + " | ".join(formatted_row) + " |")
+        # 按列格式化后再按行拼接，避免iterrows逐行构造Series
+        formatted_columns = [
+            [self.format_value(col, value) for value in data[col].tolist()]
+            for col in data.columns
+        ]
+        md_lines.extend(
+            "| " + " | ".join(formatted_row) + " |"
+            for formatted_row in zip(*formatted_columns)
+        )
         
         return "\n".join(md_lines) + "\n"
     
@@ -15,6 +15,7 @@ from .boll_indicators import calculate_boll
 from .macd_indicators import calculate_macd
 from .kdj_indicators import calculate_kdj
 from .rsi_indicators import calculate_rsi
+from .incremental_indicators import IncrementalIndicators
 
 __all__ = [
     'calculate_ma',
@@ -22,5 +23,6 @@ __all__ = [
     'calculate_boll',
     'calculate_macd',
     'calculate_kdj',
-    'calculate_rsi'
+    'calculate_rsi',
+    'IncrementalIndicators'
 ] 
\ No newline at end of file
@@ -9,7 +9,33 @@
 
 import pandas as pd
 import numpy as np
-from typing import Tuple
+from typing import Tuple, Dict
+
+
+def _boll_columns(price: pd.Series, period: int, std_multiplier: float) -> Dict[str, pd.Series]:
+    """计算布林带各列，返回{列名: 指标序列}"""
+    # 中轨和标准差共用同一个滚动窗口
+    rolling = price.rolling(window=period, min_periods=1)
+    
+    # 计算中轨（移动平均线）和标准差
+    boll_mid = rolling.mean()
+    rolling_std = rolling.std()
+    
+    # 计算上轨和下轨
+    boll_upper = boll_mid + (rolling_std * std_multiplier)
+    boll_lower = boll_mid - (rolling_std * std_multiplier)
+    
+    # 计算布林带宽度（上轨与下轨的差值）
+    boll_width = boll_upper - boll_lower
+    
+    return {
+        'BOLL_MID': boll_mid,
+        'BOLL_UPPER': boll_upper,
+        'BOLL_LOWER': boll_lower,
+        'BOLL_WIDTH': boll_width,
+        # 价格在布林带中的位置（%B指标）
+        'BOLL_PB': (price - boll_lower) / boll_width
+    }
 
 
 def calculate_boll(data: pd.DataFrame, price_column: str = 'close', period: int = 20, std_multiplier: float = 2.0) -> pd.DataFrame:
@@ -31,25 +57,14 @@ def calculate_boll(data: pd.DataFrame, price_column: str = 'close', period: int
     if result[price_column].dtype == 'object':
         result[price_column] = pd.to_numeric(result[price_column], errors='coerce')
     
-    # 确保数据按日期升序排序（最早的在前面）
+    # 确保数据按日期升序排序（最早的在前面），已是升序时跳过重排
     if 'date' in result.columns:
-        result = result.sort_values('date').reset_index(drop=True)
-    
-    # 计算中轨（移动平均线）
-    result['BOLL_MID'] = result[price_column].rolling(window=period, min_periods=1).mean()
-    
-    # 计算标准差
-    rolling_std = result[price_column].rolling(window=period, min_periods=1).std()
-    
-    # 计算上轨和下轨
-    result['BOLL_UPPER'] = result['BOLL_MID'] + (rolling_std * std_multiplier)
-    result['BOLL_LOWER'] = result['BOLL_MID'] - (rolling_std * std_multiplier)
-    
-    # 计算布林带宽度（上轨与下轨的差值）
-    result['BOLL_WIDTH'] = result['BOLL_UPPER'] - result['BOLL_LOWER']
+        if not result['date'].is_monotonic_increasing:
+            result = result.sort_values('date')
+        result = result.reset_index(drop=True)
     
-    # 计算价格在布林带中的位置（%B指标）
-    result['BOLL_PB'] = (result[price_column] - result['BOLL_LOWER']) / (result['BOLL_UPPER'] - result['BOLL_LOWER'])
+    # 各列一次性写入
+    result = result.assign(**_boll_columns(result[price_column], period, std_multiplier))
     
     return result
 
@@ -0,0 +1,402 @@
+"""
+增量技术指标计算模块
+
+实时行情按K线逐根推送时，每来一根新K线就对全部历史重新计算MA、BOLL、RSI等指标
+会带来O(N)的单次开销。本模块维护各指标的运行状态（滚动和、EMA当前值、单调队列），
+每次推送只更新状态并返回最新一根K线的指标值，单次开销与历史长度无关。
+
+指标口径与 TechnicalIndicatorCalculator.calculate_all_indicators 一致，包括pandas对
+缺失值（NaN）和窗口内价格完全相同（如停牌）时的处理方式。
+"""
+
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+def _div(numerator: float, denominator: float) -> float:
+    """按pandas浮点除法语义相除：0/0为NaN，非零/0为无穷"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+def _valid(value: Optional[float]) -> bool:
+    """是否为有效样本：与pandas滚动/EWM计算一致，NaN和正负无穷都不计入"""
+    return value is not None and not math.isnan(value) and not math.isinf(value)
+
+
+class _RollingMean:
+    """
+    滚动均值的增量状态，对应 rolling(window).mean() 的逐点计算
+
+    与pandas一致：Kahan补偿求和，NaN不计入样本，窗口内非NaN值全部相同时直接返回该值，
+    保证停牌等平盘窗口的结果不受浮点误差影响
+    """
+
+    __slots__ = ('min_periods', 'nobs', 'sum_x', 'neg_ct', 'comp_add', 'comp_remove',
+                 'same_count', 'prev_value')
+
+    def __init__(self, min_periods: int):
+        self.min_periods = min_periods
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = None
+
+    def update(self, value: float, removed: Optional[float]) -> float:
+        """加入新值、移出滑出窗口的旧值（无则为None），返回当前窗口均值"""
+        if _valid(removed):
+            self.nobs -= 1
+            y = -removed - self.comp_remove
+            t = self.sum_x + y
+            self.comp_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, removed) < 0:
+                self.neg_ct -= 1
+        if _valid(value):
+            self.nobs += 1
+            y = value - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            self.same_count = self.same_count + 1 if value == self.prev_value else 1
+            self.prev_value = value
+
+        nobs = self.nobs
+        if nobs < self.min_periods or nobs == 0:
+            return math.nan
+        if self.same_count >= nobs:
+            return self.prev_value
+        result = self.sum_x / nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == nobs and result > 0:
+            return 0.0
+        return result
+
+
+class _RollingStd:
+    """
+    滚动样本标准差（ddof=1, min_periods=1）的增量状态，对应 rolling(window).std()
+
+    与pandas一致：带补偿的Welford递推，窗口内非NaN值全部相同时方差为0
+    """
+
+    __slots__ = ('nobs', 'mean_x', 'ssqdm_x', 'comp_add', 'comp_remove', 'same_count', 'prev_value')
+
+    def __init__(self):
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = None
+
+    def update(self, value: float, removed: Optional[float]) -> float:
+        """加入新值、移出滑出窗口的旧值（无则为None），返回当前窗口标准差"""
+        if _valid(removed):
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.comp_remove
+                y = removed - self.comp_remove
+                t = y - self.mean_x
+                self.comp_remove = t + self.mean_x - y
+                self.mean_x -= t / self.nobs
+                self.ssqdm_x -= (removed - prev_mean) * (removed - self.mean_x)
+            else:
+                self.mean_x = 0.0
+                self.ssqdm_x = 0.0
+        if _valid(value):
+            self.same_count = self.same_count + 1 if value == self.prev_value else 1
+            self.prev_value = value
+            self.nobs += 1
+            prev_mean = self.mean_x - self.comp_add
+            y = value - self.comp_add
+            t = y - self.mean_x
+            self.comp_add = t + self.mean_x - y
+            self.mean_x += t / self.nobs
+            self.ssqdm_x += (value - prev_mean) * (value - self.mean_x)
+
+        nobs = self.nobs
+        if nobs <= 1:
+            return math.nan
+        if self.same_count >= nobs:
+            return 0.0
+        variance = self.ssqdm_x / (nobs - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class _EwmState:
+    """单个EWM的递推状态，对应 ewm(com=com, adjust=False) 的逐点计算（含NaN处理）"""
+
+    __slots__ = ('alpha', 'weighted', 'old_wt')
+
+    def __init__(self, com: float):
+        self.alpha = 1.0 / (1.0 + com)
+        self.weighted = None
+        self.old_wt = 1.0
+
+    @classmethod
+    def from_span(cls, span: int) -> '_EwmState':
+        return cls((span - 1) / 2.0)
+
+    @classmethod
+    def from_alpha(cls, alpha: float) -> '_EwmState':
+        return cls(1.0 / alpha - 1.0)
+
+    def update(self, value: float) -> float:
+        """推入新值并返回最新EWM；NaN/无穷不参与加权，仅让历史权重继续衰减"""
+        if not _valid(value):
+            value = math.nan
+        weighted = self.weighted
+        if weighted is None or weighted != weighted:
+            # 尚未出现有效值
+            self.weighted = value
+            return value
+        self.old_wt *= 1.0 - self.alpha
+        if _valid(value):
+            if weighted != value:
+                self.weighted = (self.old_wt * weighted + self.alpha * value) / (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+        return self.weighted
+
+
+class IncrementalIndicators:
+    """增量技术指标计算器，逐根K线推送并返回最新指标值"""
+
+    __slots__ = (
+        'ma_periods', 'ema_periods', 'boll_period', 'boll_std', 'kdj_k',
+        'count', 'close_buf', 'ma_states', 'boll_mean', 'boll_std_state', 'ema_states',
+        'macd_fast_ema', 'macd_slow_ema', 'macd_signal_ema',
+        'high_deque', 'low_deque', 'k_ewm', 'd_ewm',
+        'prev_close', 'gain_ewm', 'loss_ewm'
+    )
+
+    def __init__(self, ma_periods: List[int] = [5, 10, 20, 30],
+                 ema_periods: List[int] = [12, 26],
+                 boll_period: int = 20, boll_std: float = 2.0,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                 kdj_k: int = 9, kdj_d: int = 3, kdj_j: int = 3,
+                 rsi_period: int = 14):
+        """
+        初始化增量指标计算器，参数含义与 calculate_all_indicators 相同
+        """
+        self.ma_periods = list(ma_periods)
+        self.ema_periods = list(ema_periods)
+        self.boll_period = boll_period
+        self.boll_std = boll_std
+        self.kdj_k = kdj_k
+
+        self.count = 0
+        # 收盘价窗口多保留一个位置，用于取出刚滑出各滚动窗口的旧值
+        self.close_buf = deque(maxlen=max(self.ma_periods + [boll_period]) + 1)
+        self.ma_states = {period: _RollingMean(min_periods=period) for period in self.ma_periods}
+        self.ema_states = {period: _EwmState.from_span(period) for period in self.ema_periods}
+
+        # BOLL
+        self.boll_mean = _RollingMean(min_periods=1)
+        self.boll_std_state = _RollingStd()
+
+        # MACD
+        self.macd_fast_ema = _EwmState.from_span(macd_fast)
+        self.macd_slow_ema = _EwmState.from_span(macd_slow)
+        self.macd_signal_ema = _EwmState.from_span(macd_signal)
+
+        # KDJ：单调队列中保存(序号, 价格)，队首即窗口内最高价/最低价
+        self.high_deque = deque()
+        self.low_deque = deque()
+        self.k_ewm = _EwmState.from_alpha(1 / kdj_d)
+        self.d_ewm = _EwmState.from_alpha(1 / kdj_j)
+
+        # RSI
+        self.prev_close = None
+        self.gain_ewm = _EwmState.from_alpha(1 / rsi_period)
+        self.loss_ewm = _EwmState.from_alpha(1 / rsi_period)
+
+    def _push_window(self, window: deque, price: float, index: int, is_max: bool) -> float:
+        """单调队列入队并剔除窗口外数据，返回窗口极值（NaN不入队，窗口内无有效值时为NaN）"""
+        if price == price:
+            if is_max:
+                while window and window[-1][1] <= price:
+                    window.pop()
+            else:
+                while window and window[-1][1] >= price:
+                    window.pop()
+            window.append((index, price))
+        while window and window[0][0] <= index - self.kdj_k:
+            window.popleft()
+        return window[0][1] if window else math.nan
+
+    def push(self, open_price: float, high: float, low: float, close: float,
+             volume: float = 0.0) -> Dict[str, float]:
+        """
+        推送一根新K线并返回其指标值
+
+        Args:
+            open_price: 开盘价
+            high: 最高价
+            low: 最低价
+            close: 收盘价
+            volume: 成交量（当前指标未使用，保留以便统一推送接口）
+
+        Returns:
+            Dict[str, float]: {指标列名: 最新值}，列名与 calculate_all_indicators 输出一致
+        """
+        high, low, close = float(high), float(low), float(close)
+        index = self.count
+        self.count += 1
+        values = {}
+
+        buf = self.close_buf
+        buf.append(close)
+        size = len(buf)
+
+        # MA：窗口内有NaN或样本不足周期时为NaN（min_periods=period）
+        for period in self.ma_periods:
+            removed = buf[-period - 1] if size > period else None
+            values[f'MA{period}'] = self.ma_states[period].update(close, removed)
+
+        # EMA
+        for period in self.ema_periods:
+            values[f'EMA{period}'] = self.ema_states[period].update(close)
+
+        # BOLL：样本标准差（ddof=1），min_periods=1
+        removed = buf[-self.boll_period - 1] if size > self.boll_period else None
+        boll_mid = self.boll_mean.update(close, removed)
+        rolling_std = self.boll_std_state.update(close, removed)
+        boll_upper = boll_mid + rolling_std * self.boll_std
+        boll_lower = boll_mid - rolling_std * self.boll_std
+        boll_width = boll_upper - boll_lower
+        values['BOLL_UPPER'] = boll_upper
+        values['BOLL_MID'] = boll_mid
+        values['BOLL_LOWER'] = boll_lower
+        values['BOLL_WIDTH'] = boll_width
+        values['BOLL_PB'] = _div(close - boll_lower, boll_width)
+
+        # MACD
+        macd = self.macd_fast_ema.update(close) - self.macd_slow_ema.update(close)
+        macd_signal = self.macd_signal_ema.update(macd)
+        values['MACD'] = macd
+        values['MACD_Signal'] = macd_signal
+        values['MACD_Histogram'] = macd - macd_signal
+
+        # KDJ：单调队列维护窗口最高价/最低价，RSV缺失时按50处理
+        highest_high = self._push_window(self.high_deque, high, index, is_max=True)
+        lowest_low = self._push_window(self.low_deque, low, index, is_max=False)
+        rsv = _div(close - lowest_low, highest_high - lowest_low) * 100
+        if math.isnan(rsv):
+            rsv = 50.0
+        k_value = self.k_ewm.update(rsv)
+        d_value = self.d_ewm.update(k_value)
+        values['K'] = k_value
+        values['D'] = d_value
+        values['J'] = 3 * k_value - 2 * d_value
+
+        # RSI：涨跌幅缺失（首根K线或前后价格为NaN）时涨跌均按0处理
+        change = close - self.prev_close if self.prev_close is not None else math.nan
+        self.prev_close = close
+        avg_gain = self.gain_ewm.update(change if change > 0 else 0.0)
+        avg_loss = self.loss_ewm.update(-change if change < 0 else 0.0)
+        rs = _div(avg_gain, avg_loss)
+        values['RSI'] = 100 - 100 / (1 + rs) if not math.isnan(rs) else math.nan
+
+        return values
+
+    def warm_up(self, data: pd.DataFrame) -> Dict[str, float]:
+        """
+        用历史K线初始化运行状态
+
+        Args:
+            data: 包含 open/high/low/close/volume 的历史K线，按日期升序
+
+        Returns:
+            Dict[str, float]: 最后一根K线的指标值，历史为空时返回空字典
+        """
+        frame = data.copy()
+        if 'date' in frame.columns and not frame['date'].is_monotonic_increasing:
+            frame = frame.sort_values('date')
+        columns = ['open', 'high', 'low', 'close', 'volume']
+        for col in columns:
+            if col not in frame.columns:
+                frame[col] = frame['close'] if col != 'volume' else 0.0
+        frame[columns] = frame[columns].apply(pd.to_numeric, errors='coerce')
+
+        values = {}
+        for open_price, high, low, close, volume in frame[columns].itertuples(index=False, name=None):
+            values = self.push(open_price, high, low, close, volume)
+        return values
+
+
+def compare_with_batch(data: pd.DataFrame, rtol: float = 1e-9, atol: float = 1e-9) -> Dict[str, int]:
+    """
+    逐根推送data并与 calculate_all_indicators 的批量结果逐列比对
+
+    Args:
+        data: 包含 high/low/close 的K线数据，按日期升序
+        rtol: 相对误差容忍度
+        atol: 绝对误差容忍度
+
+    Returns:
+        Dict[str, int]: {列名: 不一致的行数}，全部一致时返回空字典
+    """
+    import numpy as np
+    from .indicator_calculator import TechnicalIndicatorCalculator
+
+    batch = TechnicalIndicatorCalculator(data).calculate_all_indicators()
+    incremental = IncrementalIndicators()
+    rows = [incremental.push(0.0, high, low, close)
+            for high, low, close in data[['high', 'low', 'close']].itertuples(index=False, name=None)]
+    pushed = pd.DataFrame(rows)
+
+    mismatches = {}
+    for col in pushed.columns:
+        expected = batch[col].to_numpy(dtype=float)
+        actual = pushed[col].to_numpy(dtype=float)
+        same = np.isclose(expected, actual, rtol=rtol, atol=atol, equal_nan=True)
+        if not same.all():
+            mismatches[col] = int((~same).sum())
+    return mismatches
+
+
+if __name__ == "__main__":
+    # 与批量计算结果的一致性校验：随机走势 + 停牌平盘段 + 缺失收盘价
+    import sys
+    import os
+    import numpy as np
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+    from data_collection.technical_indicators.incremental_indicators import compare_with_batch as _compare
+
+    rng = np.random.default_rng(0)
+    n = 300
+    close = 10 + np.cumsum(rng.normal(0, 0.2, n))
+    high = close + rng.random(n)
+    low = close - rng.random(n)
+
+    # 停牌：40根K线价格完全不变
+    close[100:140] = close[99]
+    high[100:140] = close[99]
+    low[100:140] = close[99]
+
+    # 缺失收盘价
+    close[50] = np.nan
+    close[200:203] = np.nan
+
+    cases = {
+        '随机走势(含停牌和缺失值)': pd.DataFrame({'high': high, 'low': low, 'close': close}),
+        '全程平盘': pd.DataFrame({'high': [123.45] * n, 'low': [123.45] * n, 'close': [123.45] * n}),
+    }
+    for name, frame in cases.items():
+        mismatches = _compare(frame)
+        print(f"{name}: {'一致' if not mismatches else f'不一致 {mismatches}'}")
@@ -8,11 +8,18 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Union
 
-from .ma_indicators import calculate_ma, calculate_ema, get_ma_signals
-from .boll_indicators import calculate_boll, get_boll_signals
-from .macd_indicators import calculate_macd, get_macd_signals
-from .kdj_indicators import calculate_kdj, get_kdj_signals
-from .rsi_indicators import calculate_rsi, get_rsi_signals
+from .ma_indicators import _ma_columns, _ema_columns, get_ma_signals
+from .boll_indicators import _boll_columns, get_boll_signals
+from .macd_indicators import _macd_columns, get_macd_signals
+from .kdj_indicators import _kdj_columns, get_kdj_signals
+from .rsi_indicators import _rsi_columns, get_rsi_signals
+
+
+def _to_numeric(series: pd.Series) -> pd.Series:
+    """字符串价格列转为数值，已是数值的直接返回"""
+    if series.dtype == 'object':
+        return pd.to_numeric(series, errors='coerce')
+    return series
 
 
 class TechnicalIndicatorCalculator:
@@ -28,6 +35,10 @@ class TechnicalIndicatorCalculator:
         self.data = data.copy()
         self.indicators = {}
         
+        # 计算结果缓存：指标按参数缓存，交易信号只依赖原始数据
+        self._indicator_cache = {}
+        self._signal_columns = None
+        
     def calculate_all_indicators(self, ma_periods: List[int] = [5, 10, 20, 30],
                                ema_periods: List[int] = [12, 26],
                                boll_period: int = 20, boll_std: float = 2.0,
@@ -53,39 +64,56 @@ class TechnicalIndicatorCalculator:
         Returns:
             pd.DataFrame: 包含所有技术指标的DataFrame
         """
+        cache_key = (tuple(ma_periods), tuple(ema_periods), boll_period, boll_std,
+                     macd_fast, macd_slow, macd_signal, kdj_k, kdj_d, kdj_j, rsi_period)
+        if cache_key in self._indicator_cache:
+            # 缓存中保留原始结果，每次返回副本，避免调用方修改返回值后污染缓存
+            self.indicators = self._indicator_cache[cache_key].copy()
+            return self.indicators
+        
         result = self.data.copy()
         
-        # 计算MA指标
-        ma_data = calculate_ma(result, periods=ma_periods)
-        for period in ma_periods:
-            result[f'MA{period}'] = ma_data[f'MA{period}']
+        # 价格列只转换一次，各指标直接基于序列计算，不再为每个指标复制整张表
+        close = _to_numeric(result['close'])
+        high = _to_numeric(result['high'])
+        low = _to_numeric(result['low'])
+        
+        # MA/EMA/BOLL/MACD按日期升序计算（与各指标函数的预处理保持一致）
+        sorted_close = close
+        if 'date' in result.columns and not result['date'].is_monotonic_increasing:
+            sorted_close = (pd.DataFrame({'date': result['date'], 'close': close})
+                            .sort_values('date').reset_index(drop=True)['close'])
+        
+        # 各指标列先收集到字典，最后一次性写入，避免逐列插入导致DataFrame碎片化
+        indicator_columns = {}
         
-        # 计算EMA指标
-        ema_data = calculate_ema(result, periods=ema_periods)
-        for period in ema_periods:
-            result[f'EMA{period}'] = ema_data[f'EMA{period}']
+        # 计算MA、EMA指标
+        indicator_columns.update(_ma_columns(sorted_close, ma_periods))
+        indicator_columns.update(_ema_columns(sorted_close, ema_periods))
         
         # 计算布林带
-        boll_data = calculate_boll(result, period=boll_period, std_multiplier=boll_std)
+        boll_data = _boll_columns(sorted_close, boll_period, boll_std)
         for col in ['BOLL_UPPER', 'BOLL_MID', 'BOLL_LOWER', 'BOLL_WIDTH', 'BOLL_PB']:
-            result[col] = boll_data[col]
+            indicator_columns[col] = boll_data[col]
         
         # 计算MACD
-        macd_data = calculate_macd(result, fast_period=macd_fast, slow_period=macd_slow, signal_period=macd_signal)
+        macd_data = _macd_columns(sorted_close, macd_fast, macd_slow, macd_signal)
         for col in ['MACD', 'MACD_Signal', 'MACD_Histogram']:
-            result[col] = macd_data[col]
+            indicator_columns[col] = macd_data[col]
         
         # 计算KDJ
-        kdj_data = calculate_kdj(result, k_period=kdj_k, d_period=kdj_d, j_period=kdj_j)
+        kdj_data = _kdj_columns(high, low, close, kdj_k, kdj_d, kdj_j)
         for col in ['K', 'D', 'J']:
-            result[col] = kdj_data[col]
+            indicator_columns[col] = kdj_data[col]
         
         # 计算RSI
-        rsi_data = calculate_rsi(result, period=rsi_period)
-        result['RSI'] = rsi_data['RSI']
+        indicator_columns['RSI'] = _rsi_columns(close, rsi_period)['RSI']
         
-        self.indicators = result
-        return result
+        result = result.assign(**indicator_columns)
+        
+        self._indicator_cache[cache_key] = result
+        self.indicators = result.copy()
+        return self.indicators
     
     def get_trading_signals(self) -> pd.DataFrame:
         """
@@ -97,8 +125,13 @@ class TechnicalIndicatorCalculator:
         if self.indicators.empty:
             raise ValueError("请先调用 calculate_all_indicators() 计算指标")
         
-        result = self.indicators.copy()
+        if self._signal_columns is None:
+            self._signal_columns = self._calculate_signal_columns()
         
+        return self.indicators.assign(**self._signal_columns)
+    
+    def _calculate_signal_columns(self) -> Dict[str, pd.Series]:
+        """计算各指标的交易信号列"""
         # 获取各指标的交易信号
         ma_signals = get_ma_signals(self.data)
         boll_signals = get_boll_signals(self.data)
@@ -107,7 +140,7 @@ class TechnicalIndicatorCalculator:
         rsi_signals = get_rsi_signals(self.data)
         
         # 合并信号
-        signal_columns = {
+        return {
             'MA_Signal': ma_signals['MA_Signal'],
             'MA_Cross': ma_signals['MA_Cross'],
             'BOLL_Signal': boll_signals['BOLL_Signal'],
@@ -119,11 +152,6 @@ class TechnicalIndicatorCalculator:
             'RSI_Signal': rsi_signals['RSI_Signal'],
             'RSI_Position': rsi_signals['RSI_Position']
         }
-        
-        for col, data in signal_columns.items():
-            result[col] = data
-        
-        return result
     
     def get_comprehensive_signals(self, min_signals: int = 2) -> pd.DataFrame:
         """
@@ -135,36 +163,21 @@ class TechnicalIndicatorCalculator:
         Returns:
             pd.DataFrame: 包含综合信号的DataFrame
         """
-        signals_data = self.get_trading_signals()
-        result = signals_data.copy()
-        
-        # 统计买入信号数量
-        buy_signals = 0
-        buy_signals += (result['MA_Cross'] == 1).astype(int)
-        buy_signals += (result['BOLL_Signal'] == 1).astype(int)
-        buy_signals += (result['MACD_Cross'] == 1).astype(int)
-        buy_signals += (result['KDJ_Cross'] == 1).astype(int)
-        buy_signals += (result['RSI_Signal'] == 1).astype(int)
-        
-        # 统计卖出信号数量
-        sell_signals = 0
-        sell_signals += (result['MA_Cross'] == -1).astype(int)
-        sell_signals += (result['BOLL_Signal'] == -1).astype(int)
-        sell_signals += (result['MACD_Cross'] == -1).astype(int)
-        sell_signals += (result['KDJ_Cross'] == -1).astype(int)
-        sell_signals += (result['RSI_Signal'] == -1).astype(int)
-        
-        # 生成综合信号
-        result['Buy_Signal_Count'] = buy_signals
-        result['Sell_Signal_Count'] = sell_signals
-        result['Comprehensive_Signal'] = 0
-        
-        # 当买入信号数量达到阈值时
-        result.loc[buy_signals >= min_signals, 'Comprehensive_Signal'] = 1
-        # 当卖出信号数量达到阈值时
-        result.loc[sell_signals >= min_signals, 'Comprehensive_Signal'] = -1
-        
-        return result
+        result = self.get_trading_signals()
+        
+        # 一次性统计各指标的买入/卖出信号数量
+        signal_values = result[['MA_Cross', 'BOLL_Signal', 'MACD_Cross', 'KDJ_Cross', 'RSI_Signal']].to_numpy()
+        buy_signals = (signal_values == 1).sum(axis=1)
+        sell_signals = (signal_values == -1).sum(axis=1)
+        
+        # 生成综合信号：买入信号数量达到阈值时为1，卖出信号数量达到阈值时为-1（卖出优先）
+        return result.assign(
+            Buy_Signal_Count=buy_signals,
+            Sell_Signal_Count=sell_signals,
+            Comprehensive_Signal=np.select(
+                [sell_signals >= min_signals, buy_signals >= min_signals], [-1, 1], default=0
+            )
+        )
     
     def analyze_trend_strength(self) -> pd.DataFrame:
         """
@@ -176,37 +189,43 @@ class TechnicalIndicatorCalculator:
         if self.indicators.empty:
             raise ValueError("请先调用 calculate_all_indicators() 计算指标")
         
-        result = self.indicators.copy()
+        result = self.indicators
         
-        # 趋势强度评分
-        result['Trend_Score'] = 0
+        # 收集各项趋势条件：成立记+1分，不成立记-1分
+        bullish_conditions = []
         
         # MA趋势评分
         if 'MA5' in result.columns and 'MA20' in result.columns:
-            result['Trend_Score'] += (result['MA5'] > result['MA20']).astype(int) * 2 - 1
+            bullish_conditions.append(result['MA5'] > result['MA20'])
         
         # MACD趋势评分
         if 'MACD' in result.columns and 'MACD_Signal' in result.columns:
-            result['Trend_Score'] += (result['MACD'] > result['MACD_Signal']).astype(int) * 2 - 1
+            bullish_conditions.append(result['MACD'] > result['MACD_Signal'])
         
         # RSI趋势评分
         if 'RSI' in result.columns:
-            result['Trend_Score'] += (result['RSI'] > 50).astype(int) * 2 - 1
+            bullish_conditions.append(result['RSI'] > 50)
         
         # KDJ趋势评分
         if 'K' in result.columns and 'D' in result.columns:
-            result['Trend_Score'] += (result['K'] > result['D']).astype(int) * 2 - 1
+            bullish_conditions.append(result['K'] > result['D'])
+        
+        # 趋势强度评分 = 成立条件数 * 2 - 条件总数
+        if bullish_conditions:
+            bullish_count = np.column_stack(bullish_conditions).sum(axis=1)
+            trend_score = bullish_count * 2 - len(bullish_conditions)
+        else:
+            trend_score = np.zeros(len(result), dtype=int)
         
         # 趋势强度分类
-        result['Trend_Strength'] = 'NEUTRAL'
-        result.loc[result['Trend_Score'] >= 3, 'Trend_Strength'] = 'STRONG_BULL'
-        result.loc[result['Trend_Score'] == 2, 'Trend_Strength'] = 'BULL'
-        result.loc[result['Trend_Score'] == 1, 'Trend_Strength'] = 'WEAK_BULL'
-        result.loc[result['Trend_Score'] == -1, 'Trend_Strength'] = 'WEAK_BEAR'
-        result.loc[result['Trend_Score'] == -2, 'Trend_Strength'] = 'BEAR'
-        result.loc[result['Trend_Score'] <= -3, 'Trend_Strength'] = 'STRONG_BEAR'
-        
-        return result
+        trend_strength = np.select(
+            [trend_score >= 3, trend_score == 2, trend_score == 1,
+             trend_score == -1, trend_score == -2, trend_score <= -3],
+            ['STRONG_BULL', 'BULL', 'WEAK_BULL', 'WEAK_BEAR', 'BEAR', 'STRONG_BEAR'],
+            default='NEUTRAL'
+        )
+        
+        return result.assign(Trend_Score=trend_score, Trend_Strength=trend_strength)
     
     def get_indicator_summary(self) -> Dict:
         """
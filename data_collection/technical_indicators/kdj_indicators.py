@@ -9,6 +9,36 @@ KDJ指标是随机指标的扩展，包含：
 
 import pandas as pd
 import numpy as np
+from typing import Dict
+
+
+def _kdj_columns(high: pd.Series, low: pd.Series, close: pd.Series,
+                 k_period: int, d_period: int, j_period: int) -> Dict[str, pd.Series]:
+    """计算KDJ各列，返回{列名: 指标序列}"""
+    # 计算最高价和最低价的滚动窗口
+    highest_high = high.rolling(window=k_period, min_periods=1).max()
+    lowest_low = low.rolling(window=k_period, min_periods=1).min()
+    
+    # 计算RSV (Raw Stochastic Value)
+    rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
+    rsv = rsv.fillna(50)  # 填充NaN值为50
+    
+    # 计算K值（使用指数移动平均）
+    k = rsv.ewm(alpha=1/d_period, adjust=False).mean()
+    
+    # 计算D值（K值的指数移动平均）
+    d = k.ewm(alpha=1/j_period, adjust=False).mean()
+    
+    return {
+        'K': k,
+        'D': d,
+        # 计算J值
+        'J': 3 * k - 2 * d,
+        # 保存RSV用于分析
+        'RSV': rsv,
+        'Highest_High': highest_high,
+        'Lowest_Low': lowest_low
+    }
 
 
 def calculate_kdj(data: pd.DataFrame, high_column: str = 'high', low_column: str = 'low', 
@@ -31,31 +61,15 @@ def calculate_kdj(data: pd.DataFrame, high_column: str = 'high', low_column: str
     result = data.copy()
     
     # 确保价格列为数值类型
-    for col in [high_column, low_column, close_column]:
-        if result[col].dtype == 'object':
-            result[col] = pd.to_numeric(result[col], errors='coerce')
-    
-    # 计算最高价和最低价的滚动窗口
-    highest_high = result[high_column].rolling(window=k_period, min_periods=1).max()
-    lowest_low = result[low_column].rolling(window=k_period, min_periods=1).min()
-    
-    # 计算RSV (Raw Stochastic Value)
-    rsv = (result[close_column] - lowest_low) / (highest_high - lowest_low) * 100
-    rsv = rsv.fillna(50)  # 填充NaN值为50
-    
-    # 计算K值（使用指数移动平均）
-    result['K'] = rsv.ewm(alpha=1/d_period, adjust=False).mean()
-    
-    # 计算D值（K值的指数移动平均）
-    result['D'] = result['K'].ewm(alpha=1/j_period, adjust=False).mean()
-    
-    # 计算J值
-    result['J'] = 3 * result['K'] - 2 * result['D']
-    
-    # 保存RSV用于分析
-    result['RSV'] = rsv
-    result['Highest_High'] = highest_high
-    result['Lowest_Low'] = lowest_low
+    object_columns = [col for col in [high_column, low_column, close_column] if result[col].dtype == 'object']
+    if object_columns:
+        # 一次性转换所有需要转换的价格列
+        result[object_columns] = result[object_columns].apply(pd.to_numeric, errors='coerce')
+    
+    # 各列一次性写入
+    result = result.assign(**_kdj_columns(
+        result[high_column], result[low_column], result[close_column], k_period, d_period, j_period
+    ))
     
     return result
 
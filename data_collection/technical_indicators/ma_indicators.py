@@ -6,7 +6,23 @@
 
 import pandas as pd
 import numpy as np
-from typing import Union, List
+from typing import Union, List, Dict
+
+
+def _ma_columns(price: pd.Series, periods: List[int]) -> Dict[str, pd.Series]:
+    """计算各周期MA，返回{列名: 指标序列}"""
+    return {
+        f'MA{period}': price.rolling(window=period, min_periods=period).mean()
+        for period in periods
+    }
+
+
+def _ema_columns(price: pd.Series, periods: List[int]) -> Dict[str, pd.Series]:
+    """计算各周期EMA，返回{列名: 指标序列}"""
+    return {
+        f'EMA{period}': price.ewm(span=period, adjust=False).mean()
+        for period in periods
+    }
 
 
 def calculate_ma(data: pd.DataFrame, price_column: str = 'close', periods: Union[int, List[int]] = [5, 10, 20, 30]) -> pd.DataFrame:
@@ -27,18 +43,18 @@ def calculate_ma(data: pd.DataFrame, price_column: str = 'close', periods: Union
     if result[price_column].dtype == 'object':
         result[price_column] = pd.to_numeric(result[price_column], errors='coerce')
     
-    # 确保数据按日期升序排序（最早的在前面）
+    # 确保数据按日期升序排序（最早的在前面），已是升序时跳过重排
     if 'date' in result.columns:
-        result = result.sort_values('date').reset_index(drop=True)
+        if not result['date'].is_monotonic_increasing:
+            result = result.sort_values('date')
+        result = result.reset_index(drop=True)
     
     # 处理单个周期的情况
     if isinstance(periods, int):
         periods = [periods]
     
-    # 计算各个周期的移动平均线
-    for period in periods:
-        ma_column = f'MA{period}'
-        result[ma_column] = result[price_column].rolling(window=period, min_periods=period).mean()
+    # 计算各个周期的移动平均线，一次性写入避免逐列插入导致DataFrame碎片化
+    result = result.assign(**_ma_columns(result[price_column], periods))
     
     return result
 
@@ -61,18 +77,18 @@ def calculate_ema(data: pd.DataFrame, price_column: str = 'close', periods: Unio
     if result[price_column].dtype == 'object':
         result[price_column] = pd.to_numeric(result[price_column], errors='coerce')
     
-    # 确保数据按日期升序排序（最早的在前面）
+    # 确保数据按日期升序排序（最早的在前面），已是升序时跳过重排
     if 'date' in result.columns:
-        result = result.sort_values('date').reset_index(drop=True)
+        if not result['date'].is_monotonic_increasing:
+            result = result.sort_values('date')
+        result = result.reset_index(drop=True)
     
     # 处理单个周期的情况
     if isinstance(periods, int):
         periods = [periods]
     
-    # 计算各个周期的指数移动平均线
-    for period in periods:
-        ema_column = f'EMA{period}'
-        result[ema_column] = result[price_column].ewm(span=period, adjust=False).mean()
+    # 计算各个周期的指数移动平均线，一次性写入避免逐列插入导致DataFrame碎片化
+    result = result.assign(**_ema_columns(result[price_column], periods))
     
     return result
 
@@ -94,16 +110,16 @@ def calculate_multi_ma(data: pd.DataFrame, price_column: str = 'close') -> pd.Da
     if result[price_column].dtype == 'object':
         result[price_column] = pd.to_numeric(result[price_column], errors='coerce')
     
-    # 确保数据按日期升序排序（最早的在前面）
+    # 确保数据按日期升序排序（最早的在前面），已是升序时跳过重排
     if 'date' in result.columns:
-        result = result.sort_values('date').reset_index(drop=True)
+        if not result['date'].is_monotonic_increasing:
+            result = result.sort_values('date')
+        result = result.reset_index(drop=True)
     
     # 常用的移动平均线周期
     periods = [5, 10, 20, 30, 60, 120, 250]
     
-    for period in periods:
-        ma_column = f'MA{period}'
-        result[ma_column] = result[price_column].rolling(window=period, min_periods=period).mean()
+    result = result.assign(**_ma_columns(result[price_column], periods))
     
     return result
 
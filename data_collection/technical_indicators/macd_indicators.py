@@ -9,6 +9,30 @@ MACD (Moving Average Convergence Divergence) 指数平滑移动平均线，包
 
 import pandas as pd
 import numpy as np
+from typing import Dict
+
+
+def _macd_columns(price: pd.Series, fast_period: int, slow_period: int, signal_period: int) -> Dict[str, pd.Series]:
+    """计算MACD各列，返回{列名: 指标序列}"""
+    # 计算快线和慢线EMA
+    ema_fast = price.ewm(span=fast_period, adjust=False).mean()
+    ema_slow = price.ewm(span=slow_period, adjust=False).mean()
+    
+    # 计算MACD线
+    macd = ema_fast - ema_slow
+    
+    # 计算Signal线（MACD的EMA）
+    macd_signal = macd.ewm(span=signal_period, adjust=False).mean()
+    
+    return {
+        'MACD': macd,
+        'MACD_Signal': macd_signal,
+        # 计算Histogram（MACD柱状图）
+        'MACD_Histogram': macd - macd_signal,
+        # 保存EMA值用于分析
+        f'EMA{fast_period}': ema_fast,
+        f'EMA{slow_period}': ema_slow
+    }
 
 
 def calculate_macd(data: pd.DataFrame, price_column: str = 'close', 
@@ -32,26 +56,14 @@ def calculate_macd(data: pd.DataFrame, price_column: str = 'close',
     if result[price_column].dtype == 'object':
         result[price_column] = pd.to_numeric(result[price_column], errors='coerce')
     
-    # 确保数据按日期升序排序（最早的在前面）
+    # 确保数据按日期升序排序（最早的在前面），已是升序时跳过重排
     if 'date' in result.columns:
-        result = result.sort_values('date').reset_index(drop=True)
-    
-    # 计算快线和慢线EMA
-    ema_fast = result[price_column].ewm(span=fast_period, adjust=False).mean()
-    ema_slow = result[price_column].ewm(span=slow_period, adjust=False).mean()
-    
-    # 计算MACD线
-    result['MACD'] = ema_fast - ema_slow
-    
-    # 计算Signal线（MACD的EMA）
-    result['MACD_Signal'] = result['MACD'].ewm(span=signal_period, adjust=False).mean()
-    
-    # 计算Histogram（MACD柱状图）
-    result['MACD_Histogram'] = result['MACD'] - result['MACD_Signal']
+        if not result['date'].is_monotonic_increasing:
+            result = result.sort_values('date')
+        result = result.reset_index(drop=True)
     
-    # 保存EMA值用于分析
-    result[f'EMA{fast_period}'] = ema_fast
-    result[f'EMA{slow_period}'] = ema_slow
+    # 各列一次性写入
+    result = result.assign(**_macd_columns(result[price_column], fast_period, slow_period, signal_period))
     
     return result
 
@@ -6,6 +6,36 @@ RSI (Relative Strength Index) 相对强弱指标，用于衡量价格变动的
 
 import pandas as pd
 import numpy as np
+from typing import Dict
+
+
+def _rsi_columns(price: pd.Series, period: int) -> Dict[str, pd.Series]:
+    """计算RSI及中间结果，返回{列名: 指标序列}"""
+    # 计算价格变化
+    price_change = price.diff()
+    
+    # 分离涨跌
+    gain = price_change.where(price_change > 0, 0)
+    loss = -price_change.where(price_change < 0, 0)
+    
+    # 计算平均涨跌幅（使用指数移动平均）
+    avg_gain = gain.ewm(alpha=1/period, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1/period, adjust=False).mean()
+    
+    # 计算相对强度
+    rs = avg_gain / avg_loss
+    
+    return {
+        # 计算RSI
+        'RSI': 100 - (100 / (1 + rs)),
+        # 保存中间计算结果
+        'Price_Change': price_change,
+        'Gain': gain,
+        'Loss': loss,
+        'Avg_Gain': avg_gain,
+        'Avg_Loss': avg_loss,
+        'RS': rs
+    }
 
 
 def calculate_rsi(data: pd.DataFrame, price_column: str = 'close', period: int = 14) -> pd.DataFrame:
@@ -26,30 +56,8 @@ def calculate_rsi(data: pd.DataFrame, price_column: str = 'close', period: int =
     if result[price_column].dtype == 'object':
         result[price_column] = pd.to_numeric(result[price_column], errors='coerce')
     
-    # 计算价格变化
-    price_change = result[price_column].diff()
-    
-    # 分离涨跌
-    gain = price_change.where(price_change > 0, 0)
-    loss = -price_change.where(price_change < 0, 0)
-    
-    # 计算平均涨跌幅（使用指数移动平均）
-    avg_gain = gain.ewm(alpha=1/period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/period, adjust=False).mean()
-    
-    # 计算相对强度
-    rs = avg_gain / avg_loss
-    
-    # 计算RSI
-    result['RSI'] = 100 - (100 / (1 + rs))
-    
-    # 保存中间计算结果
-    result['Price_Change'] = price_change
-    result['Gain'] = gain
-    result['Loss'] = loss
-    result['Avg_Gain'] = avg_gain
-    result['Avg_Loss'] = avg_loss
-    result['RS'] = rs
+    # 各列一次性写入
+    result = result.assign(**_rsi_columns(result[price_column], period))
     
     return result
 
@@ -1,7 +1,8 @@
-from .db_utils import db_manager, stock_dao, news_dao, index_dao, ths_data_dao
+from .db_utils import get_db_manager, db_manager, stock_dao, news_dao, index_dao, ths_data_dao
 from .models import Base
 
 __all__ = [
+    'get_db_manager',
     'db_manager',
     'stock_dao',
     'news_dao',
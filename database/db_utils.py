@@ -2,20 +2,68 @@
 数据库连接和常用操作工具类
 """
 import os
+import copy
+import json
 import yaml
+from datetime import datetime, date
 from typing import Optional, Dict, Any, List
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, func, case
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
+from functools import lru_cache
 from loguru import logger
 from dotenv import load_dotenv
 
 from .models import Base
 
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+
 # 加载环境变量
 load_dotenv()
 
+# 优先使用LibYAML的C解析器，未编译时回退到纯Python实现
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 指数价格数据中需要保存的字段
+INDEX_PRICE_FIELDS = (
+    'open_price', 'high_price', 'low_price', 'close_price',
+    'preclose_price', 'volume', 'amount', 'pct_chg'
+)
+
+
+@lru_cache(maxsize=32)
+def _parse_yaml_file(path: str, mtime_ns: int, size: int) -> Any:
+    """解析YAML文件，按(路径, 修改时间, 大小)缓存，文件变化后自动重新解析"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YAML_LOADER)
+
+
+def _load_yaml(config_path: str) -> Any:
+    """读取YAML配置，返回缓存结果的深拷贝，调用方可以放心修改"""
+    path = os.path.abspath(config_path)
+    stat = os.stat(path)
+    return copy.deepcopy(_parse_yaml_file(path, stat.st_mtime_ns, stat.st_size))
+
+
+def _json_serializer(obj: Any) -> str:
+    """JSON列序列化：优先使用orjson（更快且直接支持numpy数值），未安装时回退标准库"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+def _to_datetime(value) -> datetime:
+    """将交易日期统一转换为datetime，便于与数据库中的记录比对"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
 
 class DatabaseManager:
     """数据库连接管理器"""
@@ -30,8 +78,7 @@ class DatabaseManager:
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """加载配置文件"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = _load_yaml(config_path)
             
             # 替换环境变量
             db_config = config['database']
@@ -64,7 +111,8 @@ class DatabaseManager:
                 pool_size=db_config.get('pool_size', 20),
                 max_overflow=db_config.get('max_overflow', 40),
                 pool_pre_ping=True,
-                echo=db_config.get('echo', False)
+                echo=db_config.get('echo', False),
+                json_serializer=_json_serializer
             )
             
             # 创建会话工厂
@@ -98,11 +146,18 @@ class DatabaseManager:
         """创建所有表"""
         try:
             Base.metadata.create_all(bind=self.engine)
+            self._create_missing_indexes()
             logger.info("数据库表创建成功")
         except Exception as e:
             logger.error(f"数据库表创建失败: {e}")
             raise
     
+    def _create_missing_indexes(self):
+        """补建模型中声明但已有表上缺失的索引（create_all不会给已存在的表添加索引）"""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=self.engine, checkfirst=True)
+    
     def drop_tables(self):
         """删除所有表"""
         try:
@@ -161,6 +216,25 @@ class StockDataDAO:
             logger.error(f"获取股票信息失败: {e}")
             return None
     
+    def get_stock_id_map(self, codes: Optional[List[str]] = None, active_only: bool = True) -> Dict[str, int]:
+        """一次查询获取股票代码到ID的映射，避免逐只股票查询ID"""
+        try:
+            with self.db_manager.get_session() as session:
+                from .models import Stock
+                query = session.query(Stock.code, Stock.id)
+                
+                if codes is not None:
+                    if not codes:
+                        return {}
+                    query = query.filter(Stock.code.in_(codes))
+                if active_only:
+                    query = query.filter(Stock.is_active == True)
+                
+                return {code: stock_id for code, stock_id in query}
+        except Exception as e:
+            logger.error(f"获取股票ID映射失败: {e}")
+            return {}
+    
     def get_stock_prices(self, stock_id: int, start_date: str, end_date: str) -> List[Dict]:
         """获取股票价格数据"""
         try:
@@ -185,6 +259,44 @@ class StockDataDAO:
             logger.error(f"获取股票价格数据失败: {e}")
             return []
     
+    def get_stock_prices_bulk(self, stock_ids: List[int], start_date: str, end_date: str) -> Dict[int, List[Dict]]:
+        """一次查询获取多只股票同一区间的价格数据，返回{stock_id: 按日期升序的价格列表}"""
+        if not stock_ids:
+            return {}
+        try:
+            with self.db_manager.get_session() as session:
+                from .models import StockPrice
+                rows = session.query(
+                    StockPrice.stock_id,
+                    StockPrice.trade_date,
+                    StockPrice.open_price,
+                    StockPrice.high_price,
+                    StockPrice.low_price,
+                    StockPrice.close_price,
+                    StockPrice.volume,
+                    StockPrice.amount
+                ).filter(
+                    StockPrice.stock_id.in_(stock_ids),
+                    StockPrice.trade_date >= start_date,
+                    StockPrice.trade_date <= end_date
+                ).order_by(StockPrice.stock_id, StockPrice.trade_date)
+                
+                prices_by_stock = {stock_id: [] for stock_id in stock_ids}
+                for stock_id, trade_date, open_price, high_price, low_price, close_price, volume, amount in rows:
+                    prices_by_stock[stock_id].append({
+                        'trade_date': trade_date,
+                        'open_price': open_price,
+                        'high_price': high_price,
+                        'low_price': low_price,
+                        'close_price': close_price,
+                        'volume': volume,
+                        'amount': amount
+                    })
+                return prices_by_stock
+        except Exception as e:
+            logger.error(f"批量获取股票价格数据失败: {e}")
+            return {}
+    
     def get_latest_analysis(self, stock_id: int, strategy_name: str = None) -> Optional[Dict]:
         """获取最新的分析结果"""
         try:
@@ -289,23 +401,25 @@ class NewsDataDAO:
                 
                 start_date = datetime.now() - timedelta(days=days)
                 
-                news = session.query(NewsArticle).filter(
+                # 在数据库中完成聚合，避免把整批新闻加载到Python中逐条统计
+                summary = session.query(
+                    func.count(NewsArticle.id).label('news_count'),
+                    func.coalesce(func.sum(NewsArticle.sentiment_score), 0).label('total_sentiment'),
+                    func.count(case((NewsArticle.sentiment_score > 0, 1))).label('positive_count'),
+                    func.count(case((NewsArticle.sentiment_score < 0, 1))).label('negative_count')
+                ).filter(
                     NewsArticle.stock_codes.contains([stock_code]),
                     NewsArticle.publish_time >= start_date
-                ).all()
+                ).one()
                 
-                if not news:
+                if not summary.news_count:
                     return {'count': 0, 'average_sentiment': 0, 'positive_count': 0, 'negative_count': 0}
                 
-                total_sentiment = sum(article.sentiment_score for article in news if article.sentiment_score)
-                positive_count = sum(1 for article in news if article.sentiment_score and article.sentiment_score > 0)
-                negative_count = sum(1 for article in news if article.sentiment_score and article.sentiment_score < 0)
-                
                 return {
-                    'count': len(news),
-                    'average_sentiment': total_sentiment / len(news) if news else 0,
-                    'positive_count': positive_count,
-                    'negative_count': negative_count
+                    'count': summary.news_count,
+                    'average_sentiment': float(summary.total_sentiment) / summary.news_count,
+                    'positive_count': summary.positive_count,
+                    'negative_count': summary.negative_count
                 }
         except Exception as e:
             logger.error(f"获取情感分析汇总失败: {e}")
@@ -387,6 +501,56 @@ class MarketIndexDAO:
             logger.error(f"获取最新指数价格失败: {e}")
             return None
     
+    def get_latest_index_prices(self, index_codes: List[str]) -> Dict[str, Dict]:
+        """批量获取多个指数的最新价格，按指数代码返回"""
+        if not index_codes:
+            return {}
+        
+        try:
+            with self.db_manager.get_session() as session:
+                from .models import MarketIndex, MarketIndexPrice
+                # 窗口函数为每个指数的价格按日期倒序编号，一次查询取出各指数最新的一条
+                ranked = session.query(
+                    MarketIndexPrice.index_id,
+                    MarketIndexPrice.trade_date,
+                    MarketIndexPrice.close_price,
+                    MarketIndexPrice.pct_chg,
+                    MarketIndexPrice.volume,
+                    MarketIndexPrice.amount,
+                    func.row_number().over(
+                        partition_by=MarketIndexPrice.index_id,
+                        order_by=MarketIndexPrice.trade_date.desc()
+                    ).label('rn')
+                ).join(
+                    MarketIndex, MarketIndexPrice.index_id == MarketIndex.id
+                ).filter(
+                    MarketIndex.code.in_(index_codes)
+                ).subquery()
+                
+                rows = session.query(
+                    MarketIndex.code,
+                    ranked.c.trade_date,
+                    ranked.c.close_price,
+                    ranked.c.pct_chg,
+                    ranked.c.volume,
+                    ranked.c.amount
+                ).join(
+                    ranked, ranked.c.index_id == MarketIndex.id
+                ).filter(ranked.c.rn == 1).all()
+                
+                return {
+                    row.code: {
+                        'trade_date': row.trade_date,
+                        'close_price': row.close_price,
+                        'pct_chg': row.pct_chg,
+                        'volume': row.volume,
+                        'amount': row.amount
+                    } for row in rows
+                }
+        except Exception as e:
+            logger.error(f"批量获取最新指数价格失败: {e}")
+            return {}
+    
     def save_index_basic_info(self, index_list: List[Dict]) -> int:
         """保存指数基本信息"""
         try:
@@ -432,53 +596,45 @@ class MarketIndexDAO:
     
     def save_index_price_data(self, index_id: int, price_data: List[Dict]) -> int:
         """保存指数价格数据"""
+        if not price_data:
+            return 0
+        
         try:
-            count = 0
             with self.db_manager.get_session() as session:
                 from .models import MarketIndexPrice
                 
-                for data in price_data:
-                    # 检查记录是否已存在
-                    existing_record = session.query(MarketIndexPrice).filter(
+                trade_dates = [_to_datetime(data['trade_date']) for data in price_data]
+                
+                # 一次查询取出该日期范围内的已有记录，避免逐行查询是否存在
+                existing_records = {
+                    record.trade_date: record
+                    for record in session.query(MarketIndexPrice).filter(
                         MarketIndexPrice.index_id == index_id,
-                        MarketIndexPrice.trade_date == data['trade_date']
-                    ).first()
+                        MarketIndexPrice.trade_date.between(min(trade_dates), max(trade_dates))
+                    )
+                }
+                
+                # 新记录按交易日期去重，同一日期出现多次时以最后一条为准
+                new_records_by_date = {}
+                for data, trade_date in zip(price_data, trade_dates):
+                    values = {field: data[field] for field in INDEX_PRICE_FIELDS}
                     
+                    existing_record = existing_records.get(trade_date)
                     if existing_record:
                         # 更新现有记录
-                        existing_record.open_price = data['open_price']
-                        existing_record.high_price = data['high_price']
-                        existing_record.low_price = data['low_price']
-                        existing_record.close_price = data['close_price']
-                        existing_record.preclose_price = data['preclose_price']
-                        existing_record.volume = data['volume']
-                        existing_record.amount = data['amount']
-                        existing_record.pct_chg = data['pct_chg']
+                        for field, value in values.items():
+                            setattr(existing_record, field, value)
                     else:
-                        # 创建新记录
-                        new_record = MarketIndexPrice(
-                            index_id=index_id,
-                            trade_date=data['trade_date'],
-                            open_price=data['open_price'],
-                            high_price=data['high_price'],
-                            low_price=data['low_price'],
-                            close_price=data['close_price'],
-                            preclose_price=data['preclose_price'],
-                            volume=data['volume'],
-                            amount=data['amount'],
-                            pct_chg=data['pct_chg']
-                        )
-                        session.add(new_record)
-                    
-                    count += 1
-                    
-                    # 每1000条记录提交一次
-                    if count % 1000 == 0:
-                        session.commit()
-                        logger.info(f"已保存 {count} 条指数价格数据")
+                        # 新记录稍后批量插入
+                        new_records_by_date[trade_date] = {'index_id': index_id, 'trade_date': trade_date, **values}
+                
+                new_records = list(new_records_by_date.values())
+                if new_records:
+                    session.bulk_insert_mappings(MarketIndexPrice, new_records)
                 
                 session.commit()
-                logger.info(f"指数价格数据保存完成，共 {count} 条记录")
+                count = len(price_data)
+                logger.info(f"指数价格数据保存完成，共 {count} 条记录（新增 {len(new_records)} 条）")
                 return count
                 
         except Exception as e:
@@ -502,44 +658,69 @@ class ThsDataDAO:
         if not hot_list_data:
             return 0
         
-        from .models import ThsHotList
-        
         try:
             with self.db_manager.get_session() as session:
-                # 获取交易日期并删除旧数据
-                trade_date = hot_list_data[0].get('trade_date')
-                if trade_date:
-                    session.query(ThsHotList).filter(
-                        ThsHotList.trade_date == trade_date,
-                        ThsHotList.market_type == market_type
-                    ).delete(synchronize_session=False)
-
-                # 准备新数据
-                new_records = []
-                for item in hot_list_data:
-                    record = ThsHotList(
-                        trade_date=item.get('trade_date'),
-                        market_type=market_type,
-                        ts_code=item.get('ts_code'),
-                        ts_name=item.get('ts_name'),
-                        rank=item.get('rank'),
-                        pct_change=item.get('pct_change'),
-                        current_price=item.get('current_price'),
-                        concept=str(item.get('concept')), # Ensure concept is string
-                        rank_reason=item.get('rank_reason'),
-                        hot=item.get('hot'),
-                        rank_time=item.get('rank_time')
-                    )
-                    new_records.append(record)
-                
-                # 批量插入
-                session.bulk_save_objects(new_records)
-                logger.info(f"成功保存 {len(new_records)} 条同花顺热榜数据 ({market_type})")
-                return len(new_records)
+                count = self._replace_ths_hot_list(session, hot_list_data, market_type)
+                logger.info(f"成功保存 {count} 条同花顺热榜数据 ({market_type})")
+                return count
         except Exception as e:
             logger.error(f"保存同花顺热榜数据失败: {e}")
             return 0
 
+    def save_ths_hot_list_bulk(self, items_by_market: Dict[str, List[Dict]]) -> int:
+        """
+        在同一个事务中保存多个类型的同花顺热榜数据
+        :param items_by_market: {热榜类型: 热榜数据列表}
+        :return: 成功保存的记录总数，失败时整体回滚并返回0
+        """
+        items_by_market = {market: items for market, items in items_by_market.items() if items}
+        if not items_by_market:
+            return 0
+        
+        try:
+            with self.db_manager.get_session() as session:
+                total = 0
+                for market_type, hot_list_data in items_by_market.items():
+                    total += self._replace_ths_hot_list(session, hot_list_data, market_type)
+                logger.info(f"成功保存 {total} 条同花顺热榜数据 ({len(items_by_market)} 个类型)")
+                return total
+        except Exception as e:
+            logger.error(f"批量保存同花顺热榜数据失败: {e}")
+            return 0
+
+    def _replace_ths_hot_list(self, session: Session, hot_list_data: List[Dict], market_type: str) -> int:
+        """在给定会话中替换某交易日某类型的热榜数据，返回写入的记录数"""
+        from .models import ThsHotList
+        
+        # 获取交易日期并删除旧数据
+        trade_date = hot_list_data[0].get('trade_date')
+        if trade_date:
+            session.query(ThsHotList).filter(
+                ThsHotList.trade_date == trade_date,
+                ThsHotList.market_type == market_type
+            ).delete(synchronize_session=False)
+
+        # 准备新数据
+        new_records = []
+        for item in hot_list_data:
+            new_records.append({
+                'trade_date': item.get('trade_date'),
+                'market_type': market_type,
+                'ts_code': item.get('ts_code'),
+                'ts_name': item.get('ts_name'),
+                'rank': item.get('rank'),
+                'pct_change': item.get('pct_change'),
+                'current_price': item.get('current_price'),
+                'concept': str(item.get('concept')), # Ensure concept is string
+                'rank_reason': item.get('rank_reason'),
+                'hot': item.get('hot'),
+                'rank_time': item.get('rank_time')
+            })
+        
+        # 批量插入
+        session.bulk_insert_mappings(ThsHotList, new_records)
+        return len(new_records)
+
     def get_ths_hot_list(self, market_type: str, trade_date: str) -> List[Dict]:
         """
         获取指定日期和类型的同花顺热榜数据
@@ -570,8 +751,18 @@ class ThsDataDAO:
             return []
 
 
+@lru_cache(maxsize=None)
+def _cached_db_manager(config_path: str) -> DatabaseManager:
+    return DatabaseManager(config_path)
+
+
+def get_db_manager(config_path: str = "config/config.yaml") -> DatabaseManager:
+    """获取共享的数据库管理器，同一配置文件只创建一次引擎和连接池"""
+    return _cached_db_manager(os.path.abspath(config_path))
+
+
 # 全局数据库管理器实例
-db_manager = DatabaseManager()
+db_manager = get_db_manager()
 stock_dao = StockDataDAO(db_manager)
 news_dao = NewsDataDAO(db_manager)
 index_dao = MarketIndexDAO(db_manager)
@@ -268,6 +268,7 @@ class TradingSignal(Base):
     __table_args__ = (
         Index('idx_signal_date', 'signal_date'),
         Index('idx_stock_signal', 'stock_id', 'signal_date'),
+        Index('idx_signal_strategy_date', 'strategy_name', 'signal_date'),
     )
 
 
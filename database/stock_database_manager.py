@@ -5,38 +5,53 @@
 """
 import os
 import sys
+import time
 import yaml
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from loguru import logger
 import pandas as pd
+from sqlalchemy import func
 
 # 添加项目根目录到路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
-from database.db_utils import DatabaseManager, StockDataDAO
+from database.db_utils import get_db_manager, StockDataDAO
 from database.models import Base, Stock, StockPrice, MarketIndex, MarketIndexPrice
 from data_collection.market_data.baostock_api import BaoStockAPI
 
 
+# 主要指数代码 -> 中文名称
+MAJOR_INDICES = {
+    'sh.000001': '上证指数',
+    'sz.399001': '深证成指',
+    'sz.399006': '创业板指',
+    'sh.000688': '科创50',
+    'sz.399300': '沪深300',
+    'sz.399905': '中证500'
+}
+
+
 class StockDatabaseManager:
     """股票数据库管理器"""
     
+    # 活跃股票代码缓存有效期（秒）
+    ACTIVE_CODES_TTL = 30 * 60
+    
     def __init__(self, config_path: str = "config/config.yaml"):
         """初始化数据库管理器"""
-        self.db_manager = DatabaseManager(config_path)
+        # 复用同一配置的数据库管理器，避免重复创建引擎和连接池
+        self.db_manager = get_db_manager(config_path)
         self.stock_dao = StockDataDAO(self.db_manager)
         self.baostock_api = BaoStockAPI(config_path)
         
         # 主要指数代码
-        self.major_indices = {
-            'sh.000001': '上证指数',
-            'sz.399001': '深证成指', 
-            'sz.399006': '创业板指',
-            'sh.000688': '科创50',
-            'sz.399300': '沪深300',
-            'sz.399905': '中证500'
-        }
+        self.major_indices = dict(MAJOR_INDICES)
+        
+        # 活跃股票代码缓存: {limit: (缓存时间, 代码列表)}
+        self._active_codes_cache = {}
         
     def init_database(self, force_recreate: bool = False):
         """初始化数据库"""
@@ -90,6 +105,8 @@ class StockDatabaseManager:
             
             # 保存到数据库
             saved_count = self.baostock_api.save_stock_basic_to_db(stock_list)
+            # 股票列表已变化，清空活跃股票代码缓存
+            self._active_codes_cache.clear()
             logger.info(f"股票基本信息初始化完成，共保存 {saved_count} 只股票")
             
         except Exception as e:
@@ -162,16 +179,22 @@ class StockDatabaseManager:
             logger.error(f"指数数据更新失败: {e}")
     
     def _get_active_stock_codes(self, limit: int = None) -> List[str]:
-        """获取活跃股票代码列表"""
+        """获取活跃股票代码列表（结果缓存ACTIVE_CODES_TTL秒）"""
+        cached = self._active_codes_cache.get(limit)
+        if cached and time.monotonic() - cached[0] < self.ACTIVE_CODES_TTL:
+            return list(cached[1])
+        
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(Stock.code).filter(Stock.is_active == True)
                 if limit:
                     query = query.limit(limit)
                 
-                codes = [row[0] for row in query.all()]
+                # 只查询code列并分批流式读取，不构造完整的ORM对象
+                codes = [code for (code,) in query.yield_per(1000)]
                 logger.info(f"获取到 {len(codes)} 只活跃股票")
-                return codes
+                self._active_codes_cache[limit] = (time.monotonic(), codes)
+                return list(codes)
                 
         except Exception as e:
             logger.error(f"获取股票代码列表失败: {e}")
@@ -183,35 +206,31 @@ class StockDatabaseManager:
         
         try:
             with self.db_manager.get_session() as session:
-                # 股票统计
-                stock_count = session.query(Stock).count()
-                active_stock_count = session.query(Stock).filter(Stock.is_active == True).count()
-                
-                # 价格数据统计
-                price_count = session.query(StockPrice).count()
-                
-                # 指数统计
-                index_count = session.query(MarketIndex).count()
-                index_price_count = session.query(MarketIndexPrice).count()
-                
-                # 最新数据日期
-                latest_price_date = session.query(StockPrice.trade_date).order_by(
-                    StockPrice.trade_date.desc()
-                ).first()
+                # 所有统计项合并为一条查询，只需一次数据库往返
+                row = session.query(
+                    session.query(func.count(Stock.id)).scalar_subquery().label('stock_count'),
+                    session.query(func.count(Stock.id)).filter(
+                        Stock.is_active == True
+                    ).scalar_subquery().label('active_stock_count'),
+                    session.query(func.count(StockPrice.id)).scalar_subquery().label('price_count'),
+                    session.query(func.max(StockPrice.trade_date)).scalar_subquery().label('latest_price_date'),
+                    session.query(func.count(MarketIndex.id)).scalar_subquery().label('index_count'),
+                    session.query(func.count(MarketIndexPrice.id)).scalar_subquery().label('index_price_count')
+                ).one()
                 
                 stats = {
                     'stocks': {
-                        'total': stock_count,
-                        'active': active_stock_count,
-                        'inactive': stock_count - active_stock_count
+                        'total': row.stock_count,
+                        'active': row.active_stock_count,
+                        'inactive': row.stock_count - row.active_stock_count
                     },
                     'price_data': {
-                        'total_records': price_count,
-                        'latest_date': latest_price_date[0] if latest_price_date else None
+                        'total_records': row.price_count,
+                        'latest_date': row.latest_price_date
                     },
                     'indices': {
-                        'total': index_count,
-                        'price_records': index_price_count
+                        'total': row.index_count,
+                        'price_records': row.index_price_count
                     }
                 }
                 
@@ -263,12 +282,12 @@ class StockDatabaseManager:
                 )
                 stocks_df.to_csv(f"{output_dir}/stocks.csv", index=False, encoding='utf-8')
                 
-                # 导出最近30天的价格数据
-                cutoff_date = datetime.now() - timedelta(days=30)
+                # 导出最近30天的价格数据（截止日期只格式化一次，价格和指数共用）
+                cutoff_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
                 prices_df = pd.read_sql(
                     f"SELECT sp.*, s.code, s.name FROM stock_prices sp "
                     f"JOIN stocks s ON sp.stock_id = s.id "
-                    f"WHERE sp.trade_date >= '{cutoff_date.strftime('%Y-%m-%d')}'",
+                    f"WHERE sp.trade_date >= '{cutoff_date}'",
                     self.db_manager.engine
                 )
                 prices_df.to_csv(f"{output_dir}/stock_prices.csv", index=False, encoding='utf-8')
@@ -280,7 +299,7 @@ class StockDatabaseManager:
                 index_prices_df = pd.read_sql(
                     f"SELECT mip.*, mi.code, mi.name FROM market_index_prices mip "
                     f"JOIN market_indices mi ON mip.index_id = mi.id "
-                    f"WHERE mip.trade_date >= '{cutoff_date.strftime('%Y-%m-%d')}'",
+                    f"WHERE mip.trade_date >= '{cutoff_date}'",
                     self.db_manager.engine
                 )
                 index_prices_df.to_csv(f"{output_dir}/index_prices.csv", index=False, encoding='utf-8')
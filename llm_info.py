@@ -1,7 +1,8 @@
-from data_collection.market_data.history_k_data import get_k_data
+from data_collection.market_data.history_k_data import get_k_data, baostock_session
 from data_collection.technical_indicators.macd_indicators import calculate_macd
 from data_collection.technical_indicators.boll_indicators import calculate_boll
 from data_collection.technical_indicators.ma_indicators import calculate_ma
+import numpy as np
 import pandas as pd
 
 
@@ -102,11 +103,12 @@ def main():
         if len(valid_mas) >= 4:
             # 按周期排序
             valid_mas.sort(key=lambda x: x[0])
-            values = [x[1] for x in valid_mas[:4]]  # 取前4个均线
+            values = np.array([x[1] for x in valid_mas[:4]], dtype=float)  # 取前4个均线
+            ma_diff = np.diff(values)
             
-            if all(values[i] > values[i+1] for i in range(len(values)-1)):
+            if (ma_diff < 0).all():
                 print("    - 均线排列: 多头排列 📈")
-            elif all(values[i] < values[i+1] for i in range(len(values)-1)):
+            elif (ma_diff > 0).all():
                 print("    - 均线排列: 空头排列 📉")
             else:
                 print("    - 均线排列: 混乱排列 ↔️")
@@ -125,21 +127,23 @@ def test_multiple_stocks():
     test_stocks = ['600000', '000001', '300787', '688001']
     
     print("=== 测试多个股票的技术指标计算 ===")
-    for stock in test_stocks:
-        print(f"\n{'='*50}")
-        print(f"正在处理股票: {stock}")
-        print(f"{'='*50}")
-        
-        # 临时修改stock_code进行测试
-        global stock_code
-        original_code = '300787'  # 保存原值
-        
-        # 这里可以调用main函数的逻辑，但为了简化，只获取数据
-        data = get_k_data(stock, 10, "d", include_valuation=True)
-        if data is not None:
-            print(f"✅ 成功获取 {stock} 的数据，共 {len(data)} 条记录")
-        else:
-            print(f"❌ 获取 {stock} 的数据失败")
+    # 所有股票共用一次baostock登录，避免每只股票重复登录/登出
+    with baostock_session():
+        for stock in test_stocks:
+            print(f"\n{'='*50}")
+            print(f"正在处理股票: {stock}")
+            print(f"{'='*50}")
+        
+            # 临时修改stock_code进行测试
+            global stock_code
+            original_code = '300787'  # 保存原值
+        
+            # 这里可以调用main函数的逻辑，但为了简化，只获取数据
+            data = get_k_data(stock, 10, "d", include_valuation=True)
+            if data is not None:
+                print(f"✅ 成功获取 {stock} 的数据，共 {len(data)} 条记录")
+            else:
+                print(f"❌ 获取 {stock} 的数据失败")
 
 
 if __name__ == "__main__":